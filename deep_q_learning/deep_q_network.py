@@ -1,6 +1,3 @@
-import random
-from collections import deque
-
 import numpy as np
 import torch
 import torch.nn as nn
@@ -11,25 +8,30 @@ class DQN(nn.Module):
     """
     Deep Q-Network (DQN) model for reinforcement learning tasks.
 
-    This model consists of three convolutional layers followed by two fully connected layers.
-    It takes an input image (state) and outputs Q-values for each possible action.
+    This model consists of a shared trunk of three convolutional layers and a fully
+    connected layer, feeding two linear heads. It takes an input image (state) and
+    outputs Q-values for each possible level and each possible color in a single
+    forward pass, so both decisions share the convolutional compute.
 
     Args:
         input_shape (tuple): The shape of the input image (height, width).
-        num_actions (int): The number of possible actions the agent can take.
+        num_actions_level_1 (int): The number of possible actions for selecting the level.
+        num_actions_level_2 (int): The number of possible actions for selecting the color.
 
     Methods:
-        forward(x): Performs a forward pass through the network and returns Q-values.
+        forward(x): Performs a forward pass through the network and returns the
+                    level and color Q-values.
         _feature_size(shape): Computes the size of the feature map after the convolutional layers.
     """
 
-    def __init__(self, input_shape, num_actions):
+    def __init__(self, input_shape, num_actions_level_1, num_actions_level_2):
         """
         Initializes the DQN model.
 
         Args:
             input_shape (tuple): The shape of the input image (height, width).
-            num_actions (int): The number of possible actions the agent can take.
+            num_actions_level_1 (int): The number of possible actions for selecting the level.
+            num_actions_level_2 (int): The number of possible actions for selecting the color.
         """
         super(DQN, self).__init__()
 
@@ -38,9 +40,10 @@ class DQN(nn.Module):
         self.conv2 = nn.Conv2d(32, 64, kernel_size=(4, 4), stride=(2, 2))
         self.conv3 = nn.Conv2d(64, 64, kernel_size=(3, 3), stride=(1, 1))
 
-        # Fully connected layers
+        # Shared fully connected layer and the two Q-value heads
         self.fc1 = nn.Linear(self._feature_size(input_shape), 512)
-        self.fc2 = nn.Linear(512, num_actions)
+        self.fc_level = nn.Linear(512, num_actions_level_1)
+        self.fc_color = nn.Linear(512, num_actions_level_2)
 
     def _feature_size(self, shape):
         """
@@ -69,7 +72,7 @@ class DQN(nn.Module):
             x (torch.Tensor): The input tensor (batch_size, channels, height, width).
 
         Returns:
-            torch.Tensor: The output tensor containing Q-values for each action.
+            tuple: Two tensors containing the Q-values for each level and for each color.
         """
         # Apply convolutional layers with ReLU activations
         x = F.relu(self.conv1(x))
@@ -79,20 +82,25 @@ class DQN(nn.Module):
         # Flatten the tensor before passing it to the fully connected layers
         x = x.view(x.size(0), -1)
 
-        # Apply the fully connected layers with ReLU activation
+        # Apply the shared fully connected layer, then the two heads
         x = F.relu(self.fc1(x))
-        return self.fc2(x)  # Output Q-values for each action
+        return self.fc_level(x), self.fc_color(x)  # Q-values for each level and color
 
 
 class ReplayMemory:
     """
     Replay memory for storing and sampling past experiences in reinforcement learning.
 
-    This class uses a deque to store experiences up to a fixed capacity. It allows for
-    sampling random mini-batches of experiences to train the DQN.
+    Experiences are kept in preallocated contiguous tensors (one tensor per transition
+    field) with a circular write pointer, rather than a deque of Python tuples.
+    The tensors stay in host memory — page-locked when training on CUDA — so the
+    full capacity never occupies GPU memory, and sampled batches are moved to the
+    training device with non-blocking DMA copies that overlap preceding GPU work.
 
     Args:
         capacity (int): The maximum number of experiences to store.
+        state_shape (tuple): The shape of a single state (channels, height, width).
+        device (torch.device): The device sampled batches are delivered to. Defaults to CPU.
 
     Methods:
         push(state, action, reward, next_state, done): Adds a new experience to the memory.
@@ -100,27 +108,51 @@ class ReplayMemory:
         __len__(): Returns the current number of experiences stored.
     """
 
-    def __init__(self, capacity):
+    def __init__(self, capacity, state_shape=(1, 128, 64), device=None):
         """
         Initializes the replay memory.
 
         Args:
             capacity (int): The maximum number of experiences to store.
+            state_shape (tuple): The shape of a single state (channels, height, width).
+            device (torch.device): The device sampled batches are delivered to. Defaults to CPU.
         """
-        self.memory = deque(maxlen=capacity)
+        self.capacity = capacity
+        self.device = device if device is not None else torch.device("cpu")
+        # Pinning only matters (and is only legal to request) when a CUDA device
+        # will be receiving the sampled batches
+        pin = self.device.type == "cuda"
+        self.states = torch.empty((capacity, *state_shape), dtype=torch.float32, pin_memory=pin)
+        self.next_states = torch.empty((capacity, *state_shape), dtype=torch.float32, pin_memory=pin)
+        self.actions_level = torch.empty(capacity, dtype=torch.int64, pin_memory=pin)
+        self.actions_color = torch.empty(capacity, dtype=torch.int64, pin_memory=pin)
+        self.rewards = torch.empty(capacity, dtype=torch.float32, pin_memory=pin)
+        self.dones = torch.empty(capacity, dtype=torch.float32, pin_memory=pin)
+        self.index = 0
+        self.size = 0
 
     def push(self, state, action, reward, next_state, done):
         """
-        Adds a new experience to the replay memory.
+        Adds a new experience to the replay memory, overwriting the oldest one
+        once the memory is full.
 
         Args:
-            state (torch.Tensor): The state observed by the agent.
-            action (int): The action taken by the agent.
+            state (torch.Tensor): The state observed by the agent, with a batch dimension.
+            action (tuple): The (level, color) action taken by the agent.
             reward (float): The reward received after taking the action.
-            next_state (torch.Tensor): The next state observed by the agent.
+            next_state (torch.Tensor): The next state observed by the agent, with a batch dimension.
             done (bool): Whether the episode has ended.
         """
-        self.memory.append((state, action, reward, next_state, done))
+        index = self.index
+        # Detach so the buffer never keeps autograd graphs alive; copy_ moves the
+        # state onto the buffer's device without an intermediate allocation
+        self.states[index].copy_(state.detach()[0], non_blocking=True)
+        self.next_states[index].copy_(next_state.detach()[0], non_blocking=True)
+        self.actions_level[index], self.actions_color[index] = action
+        self.rewards[index] = reward
+        self.dones[index] = float(done)
+        self.index = (index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
 
     def sample(self, batch_size):
         """
@@ -130,9 +162,18 @@ class ReplayMemory:
             batch_size (int): The number of experiences to sample.
 
         Returns:
-            list: A list of sampled experiences.
+            tuple: Stacked device-resident tensors (states, actions_level, actions_color,
+                   rewards, next_states, dones), with the action tensors shaped
+                   (batch_size, 1) ready for `gather`.
         """
-        return random.sample(self.memory, batch_size)
+        idx = torch.randint(0, self.size, (batch_size,))
+        device = self.device
+        return (self.states[idx].to(device, non_blocking=True),
+                self.actions_level[idx].unsqueeze(1).to(device, non_blocking=True),
+                self.actions_color[idx].unsqueeze(1).to(device, non_blocking=True),
+                self.rewards[idx].to(device, non_blocking=True),
+                self.next_states[idx].to(device, non_blocking=True),
+                self.dones[idx].to(device, non_blocking=True))
 
     def __len__(self):
         """
@@ -141,4 +182,4 @@ class ReplayMemory:
         Returns:
             int: The number of experiences in the memory.
         """
-        return len(self.memory)
+        return self.size
@@ -7,9 +7,6 @@ from deep_q_learning.deep_q_agent import HierarchicalDQNAgent
 from environment.environment import Environment
 from training_loop import training_loop, preprocess_image, load_image
 
-# Mapping from integer to color for Jenga blocks
-INT_TO_COLOR = {0: "y", 1: "b", 2: "g"}
-
 
 def train_and_plot_winrate(agent, strategies, episode_intervals, num_tests=20, batch_size=10, target_update=10,
                            if_training_against_adversary=False):
@@ -39,8 +36,7 @@ def train_and_plot_winrate(agent, strategies, episode_intervals, num_tests=20, b
             batch_size=batch_size,
             target_update=target_update,
             if_load_weights=False if i == 0 else True,
-            level_1_path="level_1_plots.pth",
-            level_2_path="level_2_plots.pth",
+            model_path="policy_net_plots.pth",
             if_training_against_adversary=if_training_against_adversary
         )
 
@@ -102,7 +98,7 @@ def evaluate_winrate(agent, strategy, num_tests):
             if agent_action is None:
                 break
 
-            next_state, is_fallen = env.step((agent_action[0], INT_TO_COLOR[agent_action[1]]))
+            next_state, is_fallen = env.step(agent_action)
             state = preprocess_image(load_image(next_state))
 
             if is_fallen:
@@ -115,7 +111,7 @@ def evaluate_winrate(agent, strategy, num_tests):
                 wins += 1
                 break
 
-            next_state, is_fallen = env.step((agent_action[0], INT_TO_COLOR[adversary_action[1]]))
+            next_state, is_fallen = env.step((agent_action[0], adversary_action[1]))
             state = preprocess_image(load_image(next_state))
 
             if is_fallen:
@@ -43,7 +43,7 @@ def update_epsilon(agent, efficiency_threshold, move_count):
 
 
 def training_loop(num_episodes=50, batch_size=10, target_update=10, efficiency_threshold=10, if_load_weights=True,
-                  level_1_path="level_1.pth", level_2_path="level_2.pth", if_training_against_adversary=False,
+                  model_path="policy_net.pth", if_training_against_adversary=False,
                   strategy=RandomStrategy()):
     """
     Runs the training loop for the HierarchicalDQNAgent in a Jenga environment.
@@ -56,8 +56,7 @@ def training_loop(num_episodes=50, batch_size=10, target_update=10, efficiency_t
         batch_size (int): Batch size.
         target_update (int): Number of episodes after which to update the target network.
         if_load_weights (bool): Whether to load pre-existing model weights if they exist or start from scratch.
-        level_1_path (str): Path to the weights of the first DQN.
-        level_2_path (str): Path to the weights of the second DQN.
+        model_path (str): Path to the weights of the DQN.
         if_training_against_adversary (bool): Whether to train against a DNN adversary.
         strategy (Strategy): Strategy for the adversary to take.
         efficiency_threshold (int): The minimum number of moves before the tower falls to consider the strategy
@@ -73,7 +72,7 @@ def training_loop(num_episodes=50, batch_size=10, target_update=10, efficiency_t
     # Load model weights if they exist
     if if_load_weights:
         try:
-            agent.load_model(level_1_path, level_2_path)
+            agent.load_model(model_path)
         except FileNotFoundError:
             print("No previous model found. Starting from scratch")
 
@@ -88,7 +87,7 @@ def training_loop(num_episodes=50, batch_size=10, target_update=10, efficiency_t
         _run_episode(adversary, agent, batch_size, efficiency_threshold, env, episode, num_episodes, target_update)
 
     # Save model weights at the end of the training session
-    agent.save_model(level_1_path, level_2_path)
+    agent.save_model(model_path)
 
 
 def _run_episode(adversary, agent, batch_size, efficiency_threshold, env, episode, num_episodes, target_update):
@@ -198,8 +197,10 @@ def _make_move(agent, env, state, taken_actions, batch_size, previous_action=Non
         return
 
     current_stability = env.get_average_max_tilt_angle()
+    if previous_stability is None:  # First move: no stability change to penalize yet
+        previous_stability = current_stability
 
-    screenshot_filename, is_fallen = env.step((action[0], utils.INT_TO_COLOR[action[1]]))
+    screenshot_filename, is_fallen = env.step(action)
     next_state = utils.get_state_from_image(screenshot_filename)
 
     if previous_action is None:
@@ -94,16 +94,21 @@ class Environment:
         Perform an action to remove a piece from the Jenga tower.
 
         Parameters:
-            action (tuple): A tuple containing the level (int) and color (str - 'y', 'g', 'b') of the piece to remove.
+            action (tuple): A tuple containing the level (int) and color of the piece to remove. The color may be
+                            either the integer code used by the agents (0, 1, 2) or the letter the Unity protocol
+                            speaks ('y', 'b', 'g').
             wait_time (float): Number of seconds from making the action till making a snapshot.
 
         Returns:
             tuple: A tuple containing the path to the screenshot (str) and a boolean indicating if the tower has fallen.
         """
         level, color = action
+        # Agents work with integer color codes end-to-end; translate to the letter
+        # here, at the protocol boundary
+        color = INT_TO_COLOR.get(color, color)
         command = f"remove {level} {color}"
         self.send_command(command)
-        self.last_action = action  # Store the last action for possible reverting
+        self.last_action = (level, color)  # Store the last action for possible reverting
 
         # Check if the tower has fallen
         time.sleep(0.1)
@@ -1,10 +1,31 @@
+import os
+from functools import lru_cache
+
+import cv2
+import numpy as np
+import torch
 import torchvision.transforms as transforms
 from PIL import Image
 
-# Mapping from integer to color for Jenga blocks
-from environment.environment import MAX_BLOCKS_IN_LEVEL, MAX_LEVEL
+# INT_TO_COLOR (the integer-to-color mapping for Jenga blocks) lives in the
+# environment module, next to the protocol boundary that consumes it
+from environment.environment import INT_TO_COLOR, MAX_BLOCKS_IN_LEVEL, MAX_LEVEL
+
+# Per-color reward bonus, indexed by the integer color code ("b" blocks pay extra)
+_COLOR_BONUS = (0, 1, 0)
+
+# Every (level, color) action in the game, built once at import time so
+# get_possible_actions only has to do a set difference per call
+_ALL_ACTIONS = frozenset((level, color) for level in range(MAX_LEVEL) for color in range(MAX_BLOCKS_IN_LEVEL))
 
-INT_TO_COLOR = {0: "y", 1: "b", 2: "g"}
+# Built once at import time; preprocess_image runs on every environment step, so
+# rebuilding the Compose (four transform objects) per call is wasted work
+_PREPROCESS = transforms.Compose([
+    transforms.Grayscale(num_output_channels=1),  # Convert to grayscale
+    transforms.Resize((128, 64)),  # Resize to 128x64 pixels
+    transforms.ToTensor(),        # Convert to tensor
+    transforms.Normalize(mean=[0.5], std=[0.5])  # Normalize to [-1, 1]
+])
 
 
 def load_image(filename):
@@ -33,19 +54,18 @@ def preprocess_image(image):
     Returns:
         torch.Tensor: The preprocessed image as a tensor with a batch dimension.
     """
-    preprocess = transforms.Compose([
-        transforms.Grayscale(num_output_channels=1),  # Convert to grayscale
-        transforms.Resize((128, 64)),  # Resize to 128x64 pixels
-        transforms.ToTensor(),        # Convert to tensor
-        transforms.Normalize(mean=[0.5], std=[0.5])  # Normalize to [-1, 1]
-    ])
-    return preprocess(image).unsqueeze(0)  # Add batch dimension
+    return _PREPROCESS(image).unsqueeze(0)  # Add batch dimension
 
 
 def get_state_from_image(filename):
     """
-    Loads the image in the filename and preprocesses the input image by converting it to grayscale, resizing,
-    converting to a tensor, and normalizing it.
+    Loads the image in the filename and preprocesses it by converting it to grayscale,
+    resizing, converting to a tensor, and normalizing it to [-1, 1].
+
+    Uses OpenCV for the decode and resize (SIMD, multi-threaded) and normalizes the
+    single resulting buffer in place, instead of chaining PIL and torchvision
+    transforms that each allocate a new image. Repeated requests for an unchanged
+    file are served from an in-memory cache, skipping disk I/O and the decode.
 
     Args:
         filename (str): The path to the image file.
@@ -54,10 +74,37 @@ def get_state_from_image(filename):
         torch.Tensor: The preprocessed image as a tensor with a batch dimension. This image represents the state
                       of Jenga
     """
-    return preprocess_image(load_image(filename))
+    # Key the cache on the modification time as well, since the environment reuses
+    # the same screenshot path for new frames
+    return _load_state_cached(filename, os.path.getmtime(filename))
+
+
+@lru_cache(maxsize=1024)
+def _load_state_cached(filename, mtime):
+    """
+    Decodes and preprocesses a state image, memoizing on (filename, mtime).
+
+    The returned tensor is shared between cache hits; callers must not mutate it
+    in place (the replay memory copies it into its own buffers).
+
+    Args:
+        filename (str): The path to the image file.
+        mtime (float): The file's modification time, used only as part of the cache key.
+
+    Returns:
+        torch.Tensor: The preprocessed image as a tensor with a batch dimension.
+    """
+    image = cv2.imread(filename, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise FileNotFoundError(f"Could not read image file: {filename}")
+    image = cv2.resize(image, (64, 128), interpolation=cv2.INTER_AREA)  # (width, height)
+    array = image.astype(np.float32, copy=False)
+    array *= 1.0 / 127.5  # Normalize to [-1, 1] in place
+    array -= 1.0
+    return torch.from_numpy(array)[None, None]  # Add batch and channel dimensions
 
 
-def get_possible_actions(taken_actions=set()):
+def get_possible_actions(taken_actions=frozenset()):
     """
     Returns a list of possible actions that can be taken in the Jenga game, excluding those that have already been
     taken.
@@ -74,7 +121,7 @@ def get_possible_actions(taken_actions=set()):
         list: A list of possible actions that can be taken, excluding those in `taken_actions`. Each action is a tuple
               of the form (level, color).
     """
-    return list({(level, color) for level in range(MAX_LEVEL) for color in range(MAX_BLOCKS_IN_LEVEL)} - taken_actions)
+    return list(_ALL_ACTIONS - taken_actions)
 
 
 def calculate_reward(action, is_fallen, previous_stability, current_stability):
@@ -82,9 +129,10 @@ def calculate_reward(action, is_fallen, previous_stability, current_stability):
     Calculates the reward for the agent's action.
 
     Args:
-        action (tuple): The action taken by the agent, including the level and color.
+        action (tuple): The action taken by the agent, as integer (level, color).
         is_fallen (bool): Whether the tower fell after the action.
-        previous_stability (float): Stability before the move.
+        previous_stability (float): Stability before the move. The caller initializes
+                                    this to the current stability on the first move.
         current_stability (float): Stability after the move.
 
     Returns:
@@ -92,16 +140,6 @@ def calculate_reward(action, is_fallen, previous_stability, current_stability):
     """
     level, color = action
 
-    # Base reward based on the level of the block removed
-    base_reward = level + (1 if color == "b" else 0)
-
-    # Penalty for making the tower more unstable (greater tilt angle)
-    stability_penalty = previous_stability - current_stability if previous_stability else -current_stability
-
-    # Penalty if the tower has fallen
-    fall_penalty = -50 if is_fallen else 0
-
-    # Combine the rewards and penalties
-    reward = base_reward + stability_penalty + fall_penalty
-
-    return reward
+    # Base reward for the level of the block removed plus the per-color bonus,
+    # a stability penalty for increasing the tilt angle, and a fall penalty
+    return level + _COLOR_BONUS[color] + (previous_stability - current_stability) + (-50 if is_fallen else 0)